@@ -0,0 +1,62 @@
+# activity.py - shared activity aggregator for the ISA monitors. The
+# hybrid count/time coalescing and poll thresholds were copied between
+# the mk3 prototype and the wiring test; every tuning change had to be
+# made twice, so the logic lives here once. Runs under MicroPython and
+# CircuitPython - the native decorator is applied where the port has it.
+
+try:
+    import micropython
+    _native = micropython.native
+except (ImportError, AttributeError):
+    def _native(f):
+        return f
+
+TIME_THRESHOLD_MS = 10   # emit a pending marker after this long anyway
+POLL_THRESHOLD = 10      # status polls per marker
+
+# Bit flags returned by Aggregator.tick - small ints, so the hot path
+# never allocates a result tuple
+EMIT_ACTIVITY = 1
+EMIT_POLL = 2
+
+
+class Aggregator:
+    __slots__ = ('hits', 'polls', 'last', 'thr')
+
+    def __init__(self, thr=10):
+        self.hits = 0
+        self.polls = 0
+        self.last = 0
+        self.thr = thr
+
+    @_native
+    def feed(self, data_hits, poll_hits, now):
+        # Fold one drained batch in. The count threshold adapts to the
+        # arrival rate: deep batches mean a sustained transfer, so
+        # coalesce harder; shallow ones mean sparse accesses, so report
+        # sooner.
+        if data_hits:
+            if self.hits == 0:
+                self.last = now
+            self.hits += data_hits
+            if data_hits > 4:
+                self.thr = min(64, self.thr * 2)
+            else:
+                self.thr = max(4, self.thr // 2)
+        self.polls += poll_hits
+
+    @_native
+    def tick(self, elapsed):
+        # Fire on whichever threshold trips first, so a long run
+        # collapses into one marker but a lone access still shows up
+        # within TIME_THRESHOLD_MS. elapsed is ms since self.last, in
+        # whatever tick domain the caller uses.
+        flags = 0
+        if (self.hits > self.thr
+                or (self.hits and elapsed > TIME_THRESHOLD_MS)):
+            self.hits = 0
+            flags = EMIT_ACTIVITY
+        if self.polls > POLL_THRESHOLD:
+            self.polls = 0
+            flags |= EMIT_POLL
+        return flags
@@ -0,0 +1,46 @@
+# circuitpython_hdd_basic.py - earliest prototype: senses the hard drive
+# activity LED through an ADC pin instead of watching the ISA bus, and
+# plays the access sample while the LED is lit.
+
+import time
+import board
+import audiobusio
+import audiocore
+import analogio
+
+LED_SENSE_PIN = board.GP26
+ACTIVITY_THRESHOLD_V = 1.5
+ACCESS_WAV = "access.wav"
+
+# Scale factor folded together once at import: ADC counts to volts
+# (3.3 / 65535) divided by the 32 samples averaged per reading. The hot
+# loop below never touches a float until the final multiply.
+_ADC_TO_V = 3.3 / 65535 / 32
+
+hdd_input = analogio.AnalogIn(LED_SENSE_PIN)
+
+
+def get_voltage():
+    # Average 32 raw samples in integer domain to settle LED PWM flicker;
+    # the local alias saves a global dict lookup per sample
+    hv = hdd_input
+    total = 0
+    for _ in range(32):
+        total += hv.value
+    return total * _ADC_TO_V
+
+
+audio = audiobusio.I2SOut(bit_clock=board.GP16, word_select=board.GP17,
+                          data=board.GP18)
+access_fp = open(ACCESS_WAV, "rb")
+access = audiocore.WaveFile(access_fp)
+
+print("HDD LED monitor running")
+while True:
+    if get_voltage() > ACTIVITY_THRESHOLD_V:
+        if not audio.playing:
+            audio.play(access)
+    else:
+        if audio.playing:
+            audio.stop()
+    time.sleep(0.01)
@@ -0,0 +1,42 @@
+# HDD Synth configuration
+# Edit this file to match your wiring and SD card contents.
+
+# ISA bus wiring (address lines must be on consecutive GPIOs)
+ADDR_PIN_BASE = 0          # GP0..GP9 = ISA SA0..SA9
+IOR_PIN = 10               # ISA /IOR
+IOW_PIN = 11               # ISA /IOW
+
+# I/O ports that indicate hard drive activity (primary IDE)
+HDD_DATA_PORT = 0x1F0
+HDD_STATUS_PORT = 0x1F7
+
+# I2S audio output (MAX98357A or similar)
+I2S_ID = 0
+I2S_SCK_PIN = 16
+I2S_WS_PIN = 17
+I2S_SD_PIN = 18
+SAMPLE_RATE = 16000
+SAMPLE_BITS = 16
+BUFFER_SIZE = 4096
+
+# SD card on SPI1
+SD_SPI_ID = 1
+SD_SCK_PIN = 14
+SD_MOSI_PIN = 15
+SD_MISO_PIN = 12
+SD_CS_PIN = 13
+SD_MOUNT_POINT = "/sd"
+
+# Audio samples (place these in the root of the SD card)
+SPINUP_WAV = "spinup.wav"
+IDLE_WAV = "idle.wav"
+ACCESS_WAV = "access.wav"
+
+# Main loop timing
+MAIN_LOOP_DELAY_MS = 1
+HDD_STATE_CHANGE_DELAY_MS = 50
+
+# Simulation mode - generate fake HDD activity when no ISA bus is attached
+SIMULATION_MODE = False
+SIMULATION_INTERVAL_MS = 5000
+SIMULATION_ACTIVITY_PROBABILITY = 0.3
@@ -0,0 +1,338 @@
+# HDD Synth - recreate the sound of a mechanical hard drive on a retro PC.
+# Watches the ISA bus for accesses to the IDE I/O ports with the RP2040 PIO
+# and plays spinup/idle/access samples from SD over I2S.
+#
+# Runs on a Raspberry Pi Pico under MicroPython. Copy main.py, config.py and
+# the micropython-lib sdcard.py driver to the Pico.
+
+import array
+import struct
+import time
+import uos
+import _thread
+import machine
+import rp2
+import uasyncio as asyncio
+from machine import Pin, SPI, I2S
+from micropython import const
+from uctypes import addressof
+
+import sdcard
+from config import *
+
+if SIMULATION_MODE:
+    import random
+
+# Compile-time switch for hot-path logging. When False, MicroPython folds the
+# constant and drops the guarded log calls entirely, so the audio/ISA paths
+# pay nothing - no f-string allocation and no blocking UART print.
+_DEBUG = const(False)
+
+# Hot constants; const() lets the compiler inline them at the call sites.
+_ADDR_MASK = const(0x3FF)   # 10 ISA address lines
+_GPIO_IN = const(0xD0000004)  # RP2040 SIO GPIO_IN: all pads in one read
+
+# PIO0 RX FIFO registers and DREQs for the capture DMA channels
+_PIO0_RXF0 = const(0x50200020)
+_DREQ_PIO0_RX0 = const(4)
+_RING_WORDS = const(256)
+_RING_BYTES = const(_RING_WORDS * 4)
+_RING_BITS = const(10)      # log2(_RING_BYTES)
+
+
+@rp2.asm_pio(autopush=True, push_thresh=10, fifo_join=rp2.PIO.JOIN_RX)
+def ior_monitor():
+    wrap_target()
+    wait(1, pin, 10)       # wait for /IOR (in_base + 10) to be released
+    wait(0, pin, 10)       # falling edge = I/O read cycle
+    in_(pins, 10)          # capture SA0..SA9 in one go
+    wrap()
+
+
+@rp2.asm_pio(autopush=True, push_thresh=10, fifo_join=rp2.PIO.JOIN_RX)
+def iow_monitor():
+    wrap_target()
+    wait(1, pin, 11)       # /IOW = in_base + 11
+    wait(0, pin, 11)       # falling edge = I/O write cycle
+    in_(pins, 10)
+    wrap()
+
+
+class HDDSynth:
+    def __init__(self):
+        self._log("HDD Synth starting")
+        self.hdd_active = False
+        self.last_hdd_active = False
+        self.audio_file = None
+        self.audio_files = {}
+        self.audio_position = 0
+        self.audio_loop = False
+        self.current_audio = None
+        self._audio_end = 0
+        self._data_offset = {}
+        self._data_len = {}
+        self._sim_pulse = False
+        # Shutdown handshake with the core 1 audio pump
+        self._running = False
+        self._audio_done = True
+        # Bitmap of interesting low address bytes, built once: the ring
+        # drain tests it with a shift+AND instead of building a list of
+        # masked ports per captured word.
+        self._hdd_port_mask = ((1 << (HDD_DATA_PORT & 0xFF)) |
+                               (1 << (HDD_STATUS_PORT & 0xFF)))
+        # Serializes playback-state changes between the core 0 ISA loop
+        # and the core 1 audio pump
+        self._audio_lock = _thread.allocate_lock()
+        # SD reads are fastest when they are whole 512-byte sectors (FatFS
+        # skips its read-modify-write path), and a chunk must hold whole
+        # stereo 16-bit frames or the last frame tears across reads.
+        self._chunk = (BUFFER_SIZE // 512) * 512
+        if self._chunk == 0:
+            self._chunk = 512
+        assert self._chunk % 512 == 0 and self._chunk % 4 == 0
+        # One reusable read buffer; the I2S driver consumes memoryview
+        # slices of it in place, so playback never allocates.
+        self._audio_buf = bytearray(self._chunk)
+        self._audio_mv = memoryview(self._audio_buf)
+        self._init_pins()
+        self._init_isa_monitoring()
+        self._init_sd()
+        self._init_audio()
+        self._load_audio_files()
+
+    def _log(self, msg, *args):
+        # Deferred formatting: callers pass raw values instead of building
+        # f-strings, so nothing is allocated when a message is filtered out.
+        print("[%u]" % time.ticks_ms(), msg, *args)
+
+    def _init_pins(self):
+        self.addr_pins = [Pin(ADDR_PIN_BASE + i, Pin.IN, Pin.PULL_UP)
+                          for i in range(10)]
+        self.ior_pin = Pin(IOR_PIN, Pin.IN, Pin.PULL_UP)
+        self.iow_pin = Pin(IOW_PIN, Pin.IN, Pin.PULL_UP)
+
+    def _init_isa_monitoring(self):
+        try:
+            self.ior_state_machine = rp2.StateMachine(
+                0, ior_monitor, freq=12_500_000,
+                in_base=Pin(ADDR_PIN_BASE), jmp_pin=self.ior_pin)
+            self.iow_state_machine = rp2.StateMachine(
+                1, iow_monitor, freq=12_500_000,
+                in_base=Pin(ADDR_PIN_BASE), jmp_pin=self.iow_pin)
+            self.ior_state_machine.active(1)
+            self.iow_state_machine.active(1)
+            self._init_capture_dma()
+            self._log("ISA monitoring via PIO + DMA")
+        except Exception as e:
+            self.ior_state_machine = None
+            self.iow_state_machine = None
+            self._log("PIO init failed, falling back to pin polling:", e)
+
+    def _init_capture_dma(self):
+        # One DMA channel per state machine streams RX FIFO words into a
+        # power-of-two ring with no CPU involvement; detection just chases
+        # the hardware write pointer. The ring must be aligned to its own
+        # size, so allocate double and pick the aligned window.
+        self._dmas = []
+        self._dma_rings = []
+        self._ring_bases = []
+        self._dma_tails = [0, 0]
+        for sm_index in (0, 1):
+            ring = array.array("L", [0] * (2 * _RING_WORDS))
+            base = addressof(ring)
+            aligned = (base + _RING_BYTES - 1) & ~(_RING_BYTES - 1)
+            dma = rp2.DMA()
+            ctrl = dma.pack_ctrl(inc_read=False, size=2,
+                                 treq_sel=_DREQ_PIO0_RX0 + sm_index,
+                                 ring_size=_RING_BITS, ring_sel=True)
+            dma.config(read=_PIO0_RXF0 + 4 * sm_index, write=aligned,
+                       count=0xFFFFFFFF, ctrl=ctrl)
+            dma.active(1)
+            self._dmas.append(dma)
+            self._dma_rings.append(ring)  # keep a reference so the GC can't free it
+            self._ring_bases.append((aligned, (aligned - base) >> 2))
+
+    def _init_sd(self):
+        spi = SPI(SD_SPI_ID, baudrate=1_000_000,
+                  sck=Pin(SD_SCK_PIN), mosi=Pin(SD_MOSI_PIN),
+                  miso=Pin(SD_MISO_PIN))
+        sd = sdcard.SDCard(spi, Pin(SD_CS_PIN))
+        uos.mount(sd, SD_MOUNT_POINT)
+        self._log("SD card mounted at", SD_MOUNT_POINT)
+
+    def _init_audio(self):
+        self.audio_out = I2S(I2S_ID,
+                             sck=Pin(I2S_SCK_PIN), ws=Pin(I2S_WS_PIN),
+                             sd=Pin(I2S_SD_PIN),
+                             mode=I2S.TX, bits=SAMPLE_BITS,
+                             format=I2S.STEREO, rate=SAMPLE_RATE,
+                             ibuf=8 * self._chunk)
+
+    def _parse_wav(self, f):
+        # Walk the RIFF chunk list to find the real 'data' chunk; plenty of
+        # tools insert LIST/INFO chunks, so a fixed 44-byte skip plays
+        # header bytes as audio (or silence) on those files.
+        riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise ValueError("not a WAV file")
+        while True:
+            hdr = f.read(8)
+            if len(hdr) < 8:
+                raise ValueError("no data chunk")
+            cid, size = struct.unpack("<4sI", hdr)
+            if cid == b"data":
+                return f.tell(), size
+            f.seek(size + (size & 1), 1)  # chunks are word-aligned
+
+    def _load_audio_files(self):
+        for name in (SPINUP_WAV, IDLE_WAV, ACCESS_WAV):
+            path = SD_MOUNT_POINT + "/" + name
+            f = open(path, "rb")
+            offset, length = self._parse_wav(f)
+            self.audio_files[name] = f
+            self._data_offset[name] = offset
+            self._data_len[name] = length
+            self._log("Loaded", name)
+
+    def _play_audio_file(self, name, loop=False):
+        self.audio_file = self.audio_files[name]
+        self.audio_position = self._data_offset[name]
+        self._audio_end = self.audio_position + self._data_len[name]
+        self.audio_loop = loop
+        self.current_audio = name
+        self.audio_file.seek(self.audio_position)
+
+    def _update_audio_playback(self):
+        if self.audio_file is None:
+            return
+        remaining = self._audio_end - self.audio_position
+        if remaining > self._chunk:
+            remaining = self._chunk
+        if remaining > 0:
+            if remaining >= self._chunk:
+                n = self.audio_file.readinto(self._audio_buf)
+            else:
+                n = self.audio_file.readinto(self._audio_mv[:remaining])
+            if n:
+                self.audio_out.write(self._audio_mv[:n])
+                self.audio_position += n
+            else:
+                self.audio_position = self._audio_end  # truncated file
+        if self.audio_position >= self._audio_end:
+            if self.audio_loop:
+                self.audio_position = self._data_offset[self.current_audio]
+                self.audio_file.seek(self.audio_position)
+                if _DEBUG:
+                    self._log("Looping", self.current_audio)
+            else:
+                self.audio_file = None
+
+    def _detect_hdd_activity(self):
+        activity = False
+        mask = self._hdd_port_mask
+        if self.ior_state_machine:
+            for i in (0, 1):
+                dma = self._dmas[i]
+                ring = self._dma_rings[i]
+                base, off = self._ring_bases[i]
+                head = (dma.write - base) >> 2
+                tail = self._dma_tails[i]
+                while tail != head:
+                    addr = ring[off + tail] & _ADDR_MASK
+                    if (mask >> (addr & 0xFF)) & 1:
+                        if _DEBUG:
+                            self._log("ISA activity detected:", addr)
+                        activity = True
+                    tail = (tail + 1) & (_RING_WORDS - 1)
+                self._dma_tails[i] = tail
+                if dma.count < (1 << 28):
+                    # Top the transfer count back up long before it can run
+                    # out; the capture pause here is a few cycles.
+                    dma.active(0)
+                    dma.count = 0xFFFFFFFF
+                    dma.active(1)
+        else:
+            # Fallback: sample the bus directly from Python. One SIO
+            # register read captures every GPIO at once - the Pin objects
+            # from _init_pins only exist to configure the pulls.
+            raw = machine.mem32[_GPIO_IN]
+            if not (raw >> IOR_PIN) & 1 or not (raw >> IOW_PIN) & 1:
+                addr_value = (raw >> ADDR_PIN_BASE) & _ADDR_MASK
+                if (mask >> (addr_value & 0xFF)) & 1:
+                    activity = True
+        return activity
+
+    async def _isa_task(self):
+        # Drain the PIO FIFOs as fast as the scheduler allows; yield with a
+        # zero sleep so the audio task is never starved.
+        while True:
+            hdd_active = self._detect_hdd_activity()
+
+            if SIMULATION_MODE and self._sim_pulse:
+                self._sim_pulse = False
+                hdd_active = True
+
+            if hdd_active != self.last_hdd_active:
+                with self._audio_lock:
+                    if hdd_active:
+                        self._log("Access")
+                        self._play_audio_file(ACCESS_WAV, loop=True)
+                    else:
+                        self._log("Idling")
+                        self._play_audio_file(IDLE_WAV, loop=True)
+                self.last_hdd_active = hdd_active
+                # Settle time after a transition; only this task pauses,
+                # audio keeps pumping.
+                await asyncio.sleep_ms(HDD_STATE_CHANGE_DELAY_MS)
+            else:
+                await asyncio.sleep_ms(0)
+
+    def _audio_thread(self):
+        # Runs on core 1: a dedicated audio pump. The blocking I2S write
+        # paces this loop, and a slow SD read here can no longer delay ISA
+        # handling - capture DMA and the core 0 tasks keep running.
+        while self._running:
+            with self._audio_lock:
+                # Once the spinup sample finishes, settle into the idle loop
+                if self.audio_file is None and self.current_audio == SPINUP_WAV:
+                    self._play_audio_file(IDLE_WAV, loop=True)
+                self._update_audio_playback()
+        self._audio_done = True
+
+    async def _sim_task(self):
+        while True:
+            await asyncio.sleep_ms(SIMULATION_INTERVAL_MS)
+            if random.random() > 1.0 - SIMULATION_ACTIVITY_PROBABILITY:
+                self._sim_pulse = True
+                self._log("Simulated HDD activity")
+
+    async def _main(self):
+        tasks = [asyncio.create_task(self._isa_task())]
+        if SIMULATION_MODE:
+            tasks.append(asyncio.create_task(self._sim_task()))
+        await asyncio.gather(*tasks)
+
+    def start(self):
+        self._log("Starting main loop")
+        self._play_audio_file(SPINUP_WAV)
+        self._running = True
+        self._audio_done = False
+        _thread.start_new_thread(self._audio_thread, ())
+        try:
+            asyncio.run(self._main())
+        except KeyboardInterrupt:
+            self._log("Stopped")
+        finally:
+            asyncio.new_event_loop()
+            # Stop the core 1 pump and let it finish its current pass
+            # before tearing down I2S - deiniting under a blocking write
+            # leaves core 1 writing into a dead peripheral.
+            self._running = False
+            while not self._audio_done:
+                time.sleep_ms(1)
+            self.audio_out.deinit()
+
+
+if __name__ == "__main__":
+    synth = HDDSynth()
+    synth.start()
@@ -0,0 +1,249 @@
+# HDD Synth - CircuitPython port.
+# Same idea as main.py but built on audiomixer/audiocore so sample looping
+# and mixing happen in the audio DMA engine instead of the main loop.
+#
+# Copy to the Pico as code.py along with adafruit_pioasm.
+
+import array
+import os
+import time
+import board
+import busio
+import audiobusio
+import audiocore
+import audiomixer
+import sdcardio
+import storage
+import rp2pio
+import adafruit_pioasm
+import random
+
+# ISA bus wiring (address lines on consecutive GPIOs)
+ADDR_PIN_BASE = 0          # GP0..GP9 = ISA SA0..SA9
+IOR_PIN = board.GP10       # ISA /IOR
+IOW_PIN = board.GP11       # ISA /IOW
+
+# I/O ports that indicate hard drive activity (primary IDE)
+HDD_DATA_PORT = 0x1F0
+HDD_STATUS_PORT = 0x1F7
+
+# Audio samples on the SD card
+AUDIO_DIR = "/sd"
+SPINUP_WAV = "spinup.wav"
+IDLE_WAV = "idle.wav"
+ACCESS_WAV = "access.wav"
+SAMPLE_RATE = 16000
+
+# Log levels; messages below LOG_LEVEL are dropped before any formatting
+# or UART traffic happens
+DEBUG = 0
+INFO = 1
+LOG_LEVEL = INFO
+
+# Main loop timing
+MAIN_LOOP_DELAY_MS = 1
+HDD_STATE_CHANGE_DELAY_MS = 50
+
+# Simulation mode - generate fake HDD activity when no ISA bus is attached
+SIMULATION_MODE = False
+SIMULATION_INTERVAL_MS = 5000
+SIMULATION_ACTIVITY_PROBABILITY = 0.3
+
+# The PIO programs sit idle until a bus cycle actually happens, so a FIFO
+# word *is* an event - the Python side never has to sample pins on spec.
+# Autopush fires at 30 bits, so each FIFO word carries three consecutive
+# 10-bit captures: same PIO work, but the FIFO holds 3x as many bus
+# cycles before anything is lost.
+_IOR_PROGRAM = """
+.program ior_monitor
+    wait 1 pin 10
+    wait 0 pin 10
+    in pins, 10
+"""
+
+_IOW_PROGRAM = """
+.program iow_monitor
+    wait 1 pin 11
+    wait 0 pin 11
+    in pins, 10
+"""
+
+
+class HDDSynth:
+    def __init__(self):
+        self._log("HDD Synth (CircuitPython) starting")
+        self.last_hdd_active = False
+        # One bit per low address byte: bit N set means port N is an HDD
+        # port. Turns the match into a shift+AND, no list built per event.
+        self._hdd_port_mask = ((1 << (HDD_DATA_PORT & 0xFF)) |
+                               (1 << (HDD_STATUS_PORT & 0xFF)))
+        # Simulation probability as a 16-bit integer threshold so the hot
+        # loop never touches soft-float
+        self._sim_thresh = int(SIMULATION_ACTIVITY_PROBABILITY * 65536)
+        self._init_isa_monitoring()
+        self._init_sd()
+        self._init_audio()
+        self._load_audio_files()
+
+    def _log(self, message, *args, level=INFO):
+        # Filter before formatting: a suppressed message costs one compare
+        # and a return - no timestamp, no string building, no UART stall.
+        if level < LOG_LEVEL:
+            return
+        print(f"[{time.monotonic():.3f}]", message, *args)
+
+    def _init_isa_monitoring(self):
+        # PIO is required: 'in pins, 10' captures the whole address bus in
+        # a single machine cycle and the FIFO word arrives pre-packed, so
+        # there is no Python-side pin sampling at all. The pulls are owned
+        # by the state machines via pull_in_pin_up.
+        first_pin = getattr(board, f"GP{ADDR_PIN_BASE}")
+        # in_shift_right=False: shift the ISR left so the three 10-bit
+        # captures pack as bits [9:0], [19:10], [29:20], which is how
+        # _detect_hdd_activity unpacks them. The CircuitPython default
+        # shifts right and would leave every field 2 bits high.
+        self.ior_state_machine = rp2pio.StateMachine(
+            adafruit_pioasm.assemble(_IOR_PROGRAM),
+            frequency=12_500_000,
+            first_in_pin=first_pin, in_pin_count=12,
+            pull_in_pin_up=0xFFF,
+            auto_push=True, push_threshold=30, in_shift_right=False)
+        self.iow_state_machine = rp2pio.StateMachine(
+            adafruit_pioasm.assemble(_IOW_PROGRAM),
+            frequency=12_500_000,
+            first_in_pin=first_pin, in_pin_count=12,
+            pull_in_pin_up=0xFFF,
+            auto_push=True, push_threshold=30, in_shift_right=False)
+        # Scratch buffer for batch FIFO drains; sized well past the joined
+        # FIFO depth so a burst is always emptied in one readinto.
+        self._rx_buf = array.array("L", [0] * 32)
+        self._rx_mv = memoryview(self._rx_buf)
+        self._log("ISA monitoring via PIO")
+
+    def _init_sd(self):
+        spi = busio.SPI(clock=board.GP14, MOSI=board.GP15, MISO=board.GP12)
+        sd = sdcardio.SDCard(spi, board.GP13)
+        vfs = storage.VfsFat(sd)
+        storage.mount(vfs, "/sd")
+        self._log("SD card mounted at /sd")
+
+    def _init_audio(self):
+        self.audio = audiobusio.I2SOut(bit_clock=board.GP16,
+                                       word_select=board.GP17,
+                                       data=board.GP18)
+        self.mixer = audiomixer.Mixer(voice_count=1,
+                                      sample_rate=SAMPLE_RATE,
+                                      channel_count=2,
+                                      bits_per_sample=16,
+                                      samples_signed=True)
+        self.audio.play(self.mixer)
+
+    def _list_audio_files(self):
+        return [f for f in os.listdir(AUDIO_DIR) if f.endswith(".wav")]
+
+    def _load_audio_files(self):
+        self._log("Audio files found:", self._list_audio_files())
+        # Keep the spinup file object alive as an attribute so it cannot be
+        # collected out from under the voice, with a preallocated stream
+        # buffer so playback never allocates mid-stream.
+        self._spinup_fp = open(AUDIO_DIR + "/" + SPINUP_WAV, "rb")
+        self.spinup = audiocore.WaveFile(self._spinup_fp, bytearray(2048))
+        # Idle and access are short loops: decode them fully into RAM so
+        # the steady-state audio path never touches the SD card and a
+        # state switch is just a buffer swap inside the mixer DMA.
+        self.idle = self._load_raw_sample(AUDIO_DIR + "/" + IDLE_WAV)
+        self.access = self._load_raw_sample(AUDIO_DIR + "/" + ACCESS_WAV)
+
+    def _load_raw_sample(self, path):
+        with open(path, "rb") as f:
+            f.seek(44)  # our samples are canonical 44-byte-header WAVs
+            data = array.array("h")
+            data.frombytes(f.read())
+        return audiocore.RawSample(data, sample_rate=SAMPLE_RATE,
+                                   channel_count=2)
+
+    def _detect_hdd_activity(self):
+        activity = False
+        mask = self._hdd_port_mask
+        buf = self._rx_buf
+        for sm in (self.ior_state_machine, self.iow_state_machine):
+            n = sm.in_waiting
+            if not n:
+                continue
+            if n > len(buf):
+                n = len(buf)
+            sm.readinto(self._rx_mv[:n])
+            for i in range(n):
+                w = buf[i]
+                # Three 10-bit captures per word; the low 8 bits of each
+                # field index the port bitmap
+                if ((mask >> (w & 0xFF)) & 1 or
+                        (mask >> ((w >> 10) & 0xFF)) & 1 or
+                        (mask >> ((w >> 20) & 0xFF)) & 1):
+                    activity = True
+        return activity
+
+    def start(self):
+        self._log("Starting main loop")
+        # Hoist everything the loop touches into locals: every attribute
+        # access is a dict probe on CircuitPython, and this loop runs at
+        # kHz rates. LOAD_FAST is the cheapest opcode there is.
+        voice = self.mixer.voice[0]
+        detect = self._detect_hdd_activity
+        sleep = time.sleep
+        monotonic_ns = time.monotonic_ns
+        loop_delay = MAIN_LOOP_DELAY_MS / 1000.0
+        debounce_ns = HDD_STATE_CHANGE_DELAY_MS * 1_000_000
+        access = self.access
+        idle = self.idle
+        simulate = SIMULATION_MODE
+        sim_interval = SIMULATION_INTERVAL_MS
+        sim_thresh = self._sim_thresh
+        getrandbits = random.getrandbits
+
+        voice.play(self.spinup)
+        spinning_up = True
+        sim_count = 0
+        debounce_deadline = 0
+        while True:
+            hdd_active = detect()
+
+            if simulate:
+                sim_count += 1
+                if sim_count > sim_interval:
+                    sim_count = 0
+                    if getrandbits(16) < sim_thresh:
+                        hdd_active = True
+                        self._log("Simulated HDD activity")
+
+            # Debounce by deadline instead of sleeping: transitions inside
+            # the settle window are simply ignored, but the loop keeps
+            # running so no ISA activity goes unsampled.
+            if (hdd_active != self.last_hdd_active
+                    and monotonic_ns() >= debounce_deadline):
+                if hdd_active:
+                    self._log("Access")
+                    voice.play(access, loop=True)
+                else:
+                    self._log("Idling")
+                    voice.play(idle, loop=True)
+                self.last_hdd_active = hdd_active
+                spinning_up = False
+                debounce_deadline = monotonic_ns() + debounce_ns
+
+            # Once the spinup sample finishes, settle into the idle loop.
+            # This is the only state that needs a playback poll: the looped
+            # RawSamples play continuously from RAM, so in the steady state
+            # the voice never stops on its own.
+            if spinning_up and not voice.playing:
+                voice.play(idle, loop=True)
+                spinning_up = False
+
+            # Only back off when the bus is quiet; while events are queued
+            # we drain them back-to-back instead of sleeping blind.
+            if not hdd_active:
+                sleep(loop_delay)
+
+
+synth = HDDSynth()
+synth.start()
@@ -0,0 +1,7 @@
+# Freeze the HDD Synth sources into the MicroPython firmware so they ship
+# as AOT-compiled bytecode in flash instead of being parsed on every boot.
+#
+# Build from a MicroPython checkout with:
+#   make -C ports/rp2 BOARD=RPI_PICO FROZEN_MANIFEST=/path/to/manifest.py
+include("$(PORT_DIR)/boards/manifest.py")
+freeze(".", ("main.py", "config.py"))
@@ -0,0 +1,254 @@
+# diag2.py - SD card + I2S playback diagnostic.
+# Self-contained: carries its own minimal SPI-mode SD driver so card and
+# wiring problems can be pinned down without another driver layer in the
+# way. Assumes an SDHC card (block addressing).
+
+import time
+import uos
+import ustruct
+from machine import Pin, SPI, I2S
+
+SD_SPI_ID = 1
+SD_SCK_PIN = 14
+SD_MOSI_PIN = 15
+SD_MISO_PIN = 12
+SD_CS_PIN = 13
+SD_MOUNT_POINT = "/sd"
+
+I2S_ID = 0
+I2S_SCK_PIN = 16
+I2S_WS_PIN = 17
+I2S_SD_PIN = 18
+SAMPLE_RATE = 16000
+BUFFER_SIZE = 4096
+
+_CMD_TIMEOUT = 100  # ms
+_FF = b'\xff'  # reused dummy byte for response polling
+
+
+class SDCard:
+    """Minimal SPI-mode SD driver, just enough to mount a FAT card."""
+
+    def __init__(self, spi, cs):
+        self.spi = spi
+        self.cs = cs
+        self.cs.init(Pin.OUT, value=1)
+        self.sectors = 0
+        # Response polling reuses this one-byte buffer; spi.read(1) would
+        # allocate a bytes object per poll iteration
+        self._one = bytearray(1)
+        self.init_card()
+
+    def init_card(self):
+        # 80 clocks with CS high puts the card into SPI mode
+        self.spi.init(baudrate=400000)
+        for _ in range(10):
+            self.spi.write(b'\xff')
+        # CMD0: go idle
+        for _ in range(5):
+            if self._cmd(0, 0, 0x95) == 1:
+                break
+        else:
+            raise OSError("no SD card")
+        # CMD8: voltage check (v2 cards answer, v1 cards error out)
+        self._cmd(8, 0x1AA, 0x87, read_extra=4)
+        # ACMD41 with HCS until the card leaves idle
+        deadline = time.ticks_add(time.ticks_ms(), 1000)
+        while time.ticks_diff(deadline, time.ticks_ms()) > 0:
+            self._cmd(55, 0, 0)
+            if self._cmd(41, 0x40000000, 0) == 0:
+                break
+        else:
+            raise OSError("card init timeout")
+        # CMD58: read OCR
+        self._cmd(58, 0, 0, read_extra=4)
+        # CMD59 arg=0: make sure CRC checking is off (it defaults off in
+        # SPI mode, but some cards power up fussy). The two CRC bytes are
+        # still clocked with every data block - that framing is fixed by
+        # the spec - the card just no longer validates them.
+        self._cmd(59, 0, 0x91)
+        # CMD9: CSD for the sector count (CSD v2 layout)
+        csd = bytearray(16)
+        if self._cmd(9, 0, 0, release=False) == 0:
+            self._get_resp(0xfe)
+            self.spi.readinto(csd, 0xff)
+            self.spi.read(2)  # CRC
+            self.cs.value(1)
+            self.spi.write(b'\xff')
+            if (csd[0] >> 6) == 1:
+                c_size = ((csd[7] & 0x3f) << 16) | (csd[8] << 8) | csd[9]
+                self.sectors = (c_size + 1) * 1024
+        # Data transfer rate: RP2040 SPI drives SD cards fine at 25 MHz
+        # once out of the identification phase
+        self.spi.init(baudrate=25_000_000)
+
+    def _cmd(self, cmd, arg, crc, read_extra=0, release=True):
+        self.cs.value(0)
+        buf = bytearray(6)
+        buf[0] = 0x40 | cmd
+        ustruct.pack_into(">I", buf, 1, arg)
+        buf[5] = crc
+        self.spi.write(buf)
+        for _ in range(_CMD_TIMEOUT):
+            self.spi.write_readinto(_FF, self._one)
+            resp = self._one[0]
+            if not (resp & 0x80):
+                for _ in range(read_extra):
+                    self.spi.write_readinto(_FF, self._one)
+                if release:
+                    self.cs.value(1)
+                    self.spi.write(b'\xff')
+                return resp
+        self.cs.value(1)
+        self.spi.write(b'\xff')
+        return -1
+
+    def _wait_for_card_ready(self):
+        # Tight spin: the inner loop is just the SPI poll and a byte
+        # compare, the clock is only consulted every 256 polls. The common
+        # case (card ready within a few bytes) never touches time at all.
+        deadline = time.ticks_add(time.ticks_ms(), _CMD_TIMEOUT)
+        while True:
+            for _ in range(256):
+                self.spi.write_readinto(_FF, self._one)
+                if self._one[0] == 0xff:
+                    return
+            if time.ticks_diff(deadline, time.ticks_ms()) <= 0:
+                raise OSError("card busy timeout")
+
+    def _get_resp(self, token):
+        # Same shape as _wait_for_card_ready: clock checked once per 256
+        # polls, inner loop allocation- and float-free
+        deadline = time.ticks_add(time.ticks_ms(), _CMD_TIMEOUT)
+        while True:
+            for _ in range(256):
+                self.spi.write_readinto(_FF, self._one)
+                if self._one[0] == token:
+                    return
+            if time.ticks_diff(deadline, time.ticks_ms()) <= 0:
+                raise OSError("data token timeout")
+
+    def readblocks(self, block_num, buf):
+        nblocks = len(buf) // 512
+        if nblocks > 1:
+            # The VFS layer hands us multi-sector buffers for big file
+            # reads; stream those with a single CMD18 instead of paying a
+            # command round trip per sector.
+            self.readblocks_multi(block_num, buf, nblocks)
+            return
+        if self._cmd(17, block_num, 0, release=False) != 0:
+            self.cs.value(1)
+            raise OSError(5)
+        self._get_resp(0xfe)
+        self.spi.readinto(buf, 0xff)
+        self.spi.read(2)  # CRC framing; always on the wire, unchecked
+        self.cs.value(1)
+        self.spi.write(b'\xff')
+
+    def readblocks_multi(self, start_block, buf, n_blocks):
+        # CMD18 READ_MULTIPLE_BLOCK: one command, then sectors stream
+        # back-to-back until CMD12 stops the transfer. No per-sector
+        # command/response round trip or CS toggle.
+        mv = memoryview(buf)
+        if self._cmd(18, start_block, 0, release=False) != 0:
+            self.cs.value(1)
+            raise OSError(5)
+        for i in range(n_blocks):
+            self._get_resp(0xfe)
+            self.spi.readinto(mv[i * 512:(i + 1) * 512], 0xff)
+            self.spi.read(2)  # CRC framing; always on the wire, unchecked
+        self._cmd(12, 0, 0, read_extra=1)  # stop, skip the stuff byte
+        self._wait_for_card_ready()
+        self.cs.value(1)
+        self.spi.write(b'\xff')
+
+    def writeblocks(self, block_num, buf):
+        nblocks = len(buf) // 512
+        mv = memoryview(buf)
+        for i in range(nblocks):
+            if self._cmd(24, block_num + i, 0, release=False) != 0:
+                self.cs.value(1)
+                raise OSError(5)
+            self.spi.write(b'\xfe')
+            self.spi.write(mv[i * 512:(i + 1) * 512])
+            self.spi.write(b'\xff\xff')  # dummy CRC
+            self._wait_for_card_ready()
+            self.cs.value(1)
+            self.spi.write(b'\xff')
+
+    def ioctl(self, op, arg):
+        if op == 4:  # sector count
+            return self.sectors
+        if op == 5:  # sector size
+            return 512
+
+
+def _find_data_chunk(f):
+    # Walk the RIFF chunk list; a fixed read(44) assumes a canonical
+    # header and plays junk on files carrying LIST/INFO chunks.
+    riff, _, wave = ustruct.unpack("<4sI4s", f.read(12))
+    if riff != b"RIFF" or wave != b"WAVE":
+        raise ValueError("not a WAV file")
+    while True:
+        hdr = f.read(8)
+        if len(hdr) < 8:
+            raise ValueError("no data chunk")
+        cid, size = ustruct.unpack("<4sI", hdr)
+        if cid == b"data":
+            return f.tell(), size
+        f.seek(size + (size & 1), 1)  # chunks are word-aligned
+
+
+class AudioPlayer:
+    """Keeps the card mounted and the I2S interface up between plays.
+
+    Re-initialising the card (80 idle clocks, CMD0/CMD8 and the ACMD41
+    loop) costs hundreds of milliseconds; mounting once means switching
+    samples costs a file open and nothing else.
+    """
+
+    def __init__(self):
+        spi = SPI(SD_SPI_ID, sck=Pin(SD_SCK_PIN), mosi=Pin(SD_MOSI_PIN),
+                  miso=Pin(SD_MISO_PIN))
+        self.sd = SDCard(spi, Pin(SD_CS_PIN))
+        uos.mount(self.sd, SD_MOUNT_POINT)
+        print("SD card mounted,", self.sd.sectors, "sectors")
+        self.audio_out = I2S(I2S_ID, sck=Pin(I2S_SCK_PIN),
+                             ws=Pin(I2S_WS_PIN), sd=Pin(I2S_SD_PIN),
+                             mode=I2S.TX, bits=16, format=I2S.STEREO,
+                             rate=SAMPLE_RATE, ibuf=2 * BUFFER_SIZE)
+        self._tx_done = True
+        self.audio_out.irq(self._on_tx_done)
+        # Ping-pong buffers live for the player lifetime
+        self._buf_a = bytearray(BUFFER_SIZE)
+        self._buf_b = bytearray(BUFFER_SIZE)
+
+    def _on_tx_done(self, i2s):
+        self._tx_done = True
+
+    def play(self, filename):
+        with open(SD_MOUNT_POINT + "/" + filename, "rb") as f:
+            offset, _ = _find_data_chunk(f)
+            # Sector-align the start so every read streams whole blocks
+            f.seek((offset + 511) & ~511)
+            play_mv = memoryview(self._buf_a)
+            fill_mv = memoryview(self._buf_b)
+            n = f.readinto(play_mv)
+            while n:
+                self._tx_done = False
+                self.audio_out.write(play_mv[:n])
+                n_next = f.readinto(fill_mv)  # overlaps the DMA drain
+                while not self._tx_done:
+                    time.sleep_ms(1)
+                play_mv, fill_mv = fill_mv, play_mv
+                n = n_next
+
+    def close(self):
+        self.audio_out.deinit()
+        uos.umount(SD_MOUNT_POINT)
+        print("Done")
+
+
+player = AudioPlayer()
+player.play("nec_idle.wav")
+player.close()
@@ -0,0 +1,206 @@
+# main.py - ISA bus activity monitor (pico-dump).
+# Prints one character per classified I/O event so bus activity can be
+# watched over the USB serial console:
+#   H = HDD data transfer   P = HDD status poll   F = floppy controller
+#   k = keyboard data       K = keyboard status/command
+
+import array
+import sys
+import micropython
+import machine
+import rp2
+import _thread
+from collections import deque
+from machine import Pin
+from micropython import const
+from uctypes import addressof
+
+ADDR_PIN_BASE = 0   # GP0..GP9 = ISA SA0..SA9
+IOR_PIN = 10        # ISA /IOR
+IOW_PIN = 11        # ISA /IOW
+
+MONITOR_KEYBOARD = True
+activity_threshold = 20   # events coalesced into one printed character
+
+# PIO0 RX FIFO registers and DREQs for the capture DMA channels
+_PIO0_RXF0 = const(0x50200020)
+_DREQ_PIO0_RX0 = const(4)
+_RING_WORDS = const(1024)
+_RING_BYTES = const(_RING_WORDS * 4)
+_RING_BITS = const(12)
+
+
+@rp2.asm_pio(autopush=True, push_thresh=10, fifo_join=rp2.PIO.JOIN_RX)
+def ior_pio_program():
+    wrap_target()
+    wait(1, pin, 10)     # /IOR = in_base + 10
+    wait(0, pin, 10)     # falling edge = I/O read cycle
+    in_(pins, 10)
+    irq(rel(0))          # wake the consumer core out of WFI
+    wrap()
+
+
+@rp2.asm_pio(autopush=True, push_thresh=10, fifo_join=rp2.PIO.JOIN_RX)
+def iow_pio_program():
+    wrap_target()
+    wait(1, pin, 11)     # /IOW = in_base + 11
+    wait(0, pin, 11)     # falling edge = I/O write cycle
+    in_(pins, 10)
+    irq(rel(0))          # wake the consumer core out of WFI
+    wrap()
+
+
+sm_ior = rp2.StateMachine(0, ior_pio_program, freq=12_500_000,
+                          in_base=Pin(ADDR_PIN_BASE), jmp_pin=Pin(IOR_PIN))
+sm_iow = rp2.StateMachine(1, iow_pio_program, freq=12_500_000,
+                          in_base=Pin(ADDR_PIN_BASE), jmp_pin=Pin(IOW_PIN))
+sm_ior.active(1)
+sm_iow.active(1)
+
+# The PIO IRQ is purely a wake-up edge - the data still travels through
+# the DMA rings. Bursts just set the flag repeatedly; it is cleared once
+# per consumer pass.
+_pio_event = False
+
+
+def _on_pio_event(sm):
+    global _pio_event
+    _pio_event = True
+
+
+sm_ior.irq(_on_pio_event)
+sm_iow.irq(_on_pio_event)
+
+
+def _make_capture_dma(sm_index):
+    # A DMA channel per state machine streams RX FIFO words into a
+    # size-aligned ring with zero CPU cost; the loop below just chases the
+    # hardware write pointer. Allocate double and use the aligned window.
+    ring = array.array("L", [0] * (2 * _RING_WORDS))
+    base = addressof(ring)
+    aligned = (base + _RING_BYTES - 1) & ~(_RING_BYTES - 1)
+    dma = rp2.DMA()
+    ctrl = dma.pack_ctrl(inc_read=False, size=2,
+                         treq_sel=_DREQ_PIO0_RX0 + sm_index,
+                         ring_size=_RING_BITS, ring_sel=True)
+    dma.config(read=_PIO0_RXF0 + 4 * sm_index, write=aligned,
+               count=0xFFFFFFFF, ctrl=ctrl)
+    dma.active(1)
+    return dma, ring, aligned, (aligned - base) >> 2
+
+
+dma_ior, ring_ior, base_ior, off_ior = _make_capture_dma(0)
+dma_iow, ring_iow, base_iow, off_iow = _make_capture_dma(1)
+
+# Hand-off between cores is a fixed-capacity ring: core 1 appends small
+# integer event codes, core 0 pops them. On overrun the oldest event is
+# dropped instead of raising (the optional flags=1 argument would turn
+# that into IndexError) - and small-int appends never allocate.
+_HDD = const(0)
+_POLL = const(1)
+_FDD = const(2)
+_KBD_DATA = const(3)
+_KBD_STATUS = const(4)
+events = deque((), 256)
+
+# One byte per I/O address: event code + 1, zero for ports the monitor
+# ignores. A single indexed load replaces the five-way compare ladder,
+# and adding a port to watch becomes a table entry, not another branch.
+_PORT_LUT = bytearray(1024)
+_PORT_LUT[0x1F0] = _HDD + 1
+_PORT_LUT[0x1F7] = _POLL + 1
+_PORT_LUT[0x3F5] = _FDD + 1
+_PORT_LUT[0x3F2] = _FDD + 1
+_PORT_LUT[0x60] = _KBD_DATA + 1
+_PORT_LUT[0x64] = _KBD_STATUS + 1
+
+
+@micropython.viper
+def _classify(addr: int, lut: ptr8) -> int:
+    # Compiles to one ldrb; runs once per captured bus cycle
+    return lut[addr]
+
+
+def _drain():
+    # Core 1: a pure PIO->RAM->ring pump. No print() here, ever - USB
+    # CDC stalls on the other core can no longer back up the capture path.
+    lut = _PORT_LUT
+    classify = _classify
+    append = events.append
+    tail_ior = 0
+    tail_iow = 0
+    while True:
+        head = (dma_ior.write - base_ior) >> 2
+        while tail_ior != head:
+            code = classify(ring_ior[off_ior + tail_ior] & 0x3FF, lut)
+            if code:
+                append(code - 1)
+            tail_ior = (tail_ior + 1) & (_RING_WORDS - 1)
+        head = (dma_iow.write - base_iow) >> 2
+        while tail_iow != head:
+            code = classify(ring_iow[off_iow + tail_iow] & 0x3FF, lut)
+            if code:
+                append(code - 1)
+            tail_iow = (tail_iow + 1) & (_RING_WORDS - 1)
+
+
+_thread.start_new_thread(_drain, ())
+
+print("ISA bus monitor running (DMA capture, core 1 drain)")
+counters = array.array("I", [0] * 5)
+# Quiet gap detection by counting event-free passes instead of taking
+# timestamps: the loop is paced by the systick wakeup anyway, so 50
+# empty passes is the same ballpark as the old 1 s wall-clock check
+# without two time.* calls per iteration.
+idle_loops = 0
+# Status characters accumulate here and go out in one stdout write per
+# loop pass: each print("H", end="") was its own USB CDC flush, ~100 us
+# blocked with the consumer stalled behind it.
+_out = bytearray(64)
+_out_mv = memoryview(_out)
+out_n = 0
+while True:
+    # Core 0: pop classified events, aggregate, emit characters
+    if events:
+        while events:
+            counters[events.popleft()] += 1
+        idle_loops = 0
+
+    if counters[_HDD] > activity_threshold:
+        counters[_HDD] = 0
+        _out[out_n] = 72  # H
+        out_n += 1
+    if counters[_POLL] > activity_threshold:
+        counters[_POLL] = 0
+        _out[out_n] = 80  # P
+        out_n += 1
+    if counters[_FDD] > activity_threshold:
+        counters[_FDD] = 0
+        _out[out_n] = 70  # F
+        out_n += 1
+    if MONITOR_KEYBOARD:
+        if counters[_KBD_DATA]:
+            counters[_KBD_DATA] = 0
+            _out[out_n] = 107  # k
+            out_n += 1
+        if counters[_KBD_STATUS]:
+            counters[_KBD_STATUS] = 0
+            _out[out_n] = 75  # K
+            out_n += 1
+
+    idle_loops += 1
+    if idle_loops == 50:
+        _out[out_n] = 10  # blank separator after a quiet stretch
+        out_n += 1
+        idle_loops = 0
+
+    if out_n:
+        sys.stdout.write(_out_mv[:out_n])
+        out_n = 0
+
+    # WFI instead of a blind 1 ms sleep: the PIO IRQ wakes us within a
+    # few microseconds of a bus cycle, and the systick still wakes us
+    # often enough to run the separator logic when the bus is dead.
+    if not _pio_event:
+        machine.idle()
+    _pio_event = False
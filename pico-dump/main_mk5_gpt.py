@@ -0,0 +1,213 @@
+# main_mk5_gpt.py - HDD Synth mark 5 prototype.
+# Watches the primary IDE data port on the ISA bus via PIO and switches
+# between the idle and access samples over I2S. WAVs stream from SD.
+#
+# The address filtering happens inside the PIO programs: the captured
+# address is compared against Y (preloaded with the port of interest at
+# startup) and only matches are pushed. Status polls and traffic to
+# every other port never cross the FIFO at all, so the Python side only
+# wakes up for real data transfers.
+
+import time
+import uos
+import micropython
+import rp2
+import sdcard
+from machine import Pin, SPI, I2S
+
+ADDR_PIN_BASE = 0   # GP0..GP9 = ISA SA0..SA9
+IOR_PIN = 10        # ISA /IOR
+IOW_PIN = 11        # ISA /IOW
+HDD_DATA_PORT = 0x1F0
+
+SD_SPI_ID = 1
+SD_SCK_PIN = 14
+SD_MOSI_PIN = 15
+SD_MISO_PIN = 12
+SD_CS_PIN = 13
+
+I2S_ID = 0
+I2S_SCK_PIN = 16
+I2S_WS_PIN = 17
+I2S_SD_PIN = 18
+SAMPLE_RATE = 16000
+BUFFER_SIZE = 512
+
+IDLE_WAV = "idle.wav"
+ACCESS_WAV = "access.wav"
+
+# How long the data port has to stay quiet before dropping back to idle
+ACCESS_HOLDOFF_MS = 200
+
+
+# One capture program for both strobes: the watched pin comes from the
+# per-instance jmp_pin config, not the program text, and the captured
+# word carries the strobe states in bits 11:10 so every pushed word is
+# self-describing ({/IOW, /IOR, addr}). The filter compares the full
+# tagged word against Y, so each instance matches exactly one cycle
+# type on the target port - nothing else reaches the FIFO.
+@rp2.asm_pio(in_shiftdir=rp2.PIO.SHIFT_LEFT, fifo_join=rp2.PIO.JOIN_RX)
+def strobe_filter_program():
+    wrap_target()
+    label("released")
+    jmp(pin, "armed")    # strobe released (high): arm the edge detect
+    jmp("released")
+    label("armed")
+    jmp(pin, "armed")    # falls through on the falling edge
+    in_(pins, 12)        # SA0..SA9 plus both strobe pins
+    mov(x, isr)
+    mov(isr, null)       # reset the shift counter either way
+    jmp(x_not_y, "done")
+    mov(isr, x)
+    push(noblock)
+    label("done")
+    wrap()
+
+
+# Fixed assignment: machine.I2S claims PIO0 state machines, so the ISA
+# capture lives on PIO1 SM 4/5. Nothing else on this board competes for
+# them, and a constant beats probing eight SMs at every boot.
+ISA_SM_IOR = 4
+ISA_SM_IOW = 5
+
+sm_ior = rp2.StateMachine(ISA_SM_IOR, strobe_filter_program,
+                          freq=12_500_000, in_base=Pin(ADDR_PIN_BASE),
+                          jmp_pin=Pin(IOR_PIN))
+sm_iow = rp2.StateMachine(ISA_SM_IOW, strobe_filter_program,
+                          freq=12_500_000, in_base=Pin(ADDR_PIN_BASE),
+                          jmp_pin=Pin(IOW_PIN))
+
+# Preload Y with the tagged match word: during a read cycle /IOR is low
+# and /IOW high (bit 11 set), and vice versa for a write. Push it
+# through the TX FIFO, then pull and move it into Y before the program
+# starts running.
+for sm, match in ((sm_ior, (1 << 11) | HDD_DATA_PORT),
+                  (sm_iow, (1 << 10) | HDD_DATA_PORT)):
+    sm.put(match)
+    sm.exec("pull()")
+    sm.exec("mov(y, osr)")
+    sm.active(1)
+
+
+def _fifo_regs(sm_id):
+    # MMIO addresses for a state machine's RX FIFO and its FLEVEL field:
+    # RXFn at base + 0x20 + 4n, RX level at FLEVEL bits [8n+7:8n+4]
+    base = 0x50200000 if sm_id < 4 else 0x50300000
+    i = sm_id & 3
+    return base + 0x20 + 4 * i, base + 0x0C, 8 * i + 4
+
+
+_ior_rxf, _ior_flevel, _ior_shift = _fifo_regs(ISA_SM_IOR)
+_iow_rxf, _iow_flevel, _iow_shift = _fifo_regs(ISA_SM_IOW)
+
+
+@micropython.viper
+def _drain_fifo(rxf: ptr32, flevel: ptr32, shift: int) -> int:
+    # Read the FIFO register directly while FLEVEL shows pending words;
+    # the PIO filter guarantees every word is a data-port hit, so only
+    # the count matters. No StateMachine.get dispatch per word.
+    n = 0
+    while (int(flevel[0]) >> shift) & 0xF:
+        a = int(rxf[0])  # noqa: F841 - the read pops the FIFO
+        n += 1
+    return n
+
+
+def init_sd():
+    spi = SPI(SD_SPI_ID, sck=Pin(SD_SCK_PIN), mosi=Pin(SD_MOSI_PIN),
+              miso=Pin(SD_MISO_PIN))
+    # Identification must stay below 400 kHz, but the driver's default
+    # data rate of 1.32 MHz caps reads at ~160 kB/s. 25 MHz is well
+    # within what the RP2040 SPI block and SD cards handle, and shorter
+    # readinto stalls leave more loop time for the bus monitor.
+    sd = sdcard.SDCard(spi, Pin(SD_CS_PIN), baudrate=25_000_000)
+    uos.mount(sd, "/sd")
+    print("SD card mounted")
+
+
+def init_i2s():
+    i2s = I2S(I2S_ID, sck=Pin(I2S_SCK_PIN), ws=Pin(I2S_WS_PIN),
+              sd=Pin(I2S_SD_PIN), mode=I2S.TX, bits=16,
+              format=I2S.STEREO, rate=SAMPLE_RATE, ibuf=4 * BUFFER_SIZE)
+    # irq callback switches write() to non-blocking: it queues the buffer
+    # on the I2S DMA and returns immediately
+    i2s.irq(_on_tx_done)
+    return i2s
+
+
+_tx_done = True
+
+
+def _on_tx_done(i2s):
+    global _tx_done
+    _tx_done = True
+
+
+def preload(filename):
+    # The samples are short and the RP2040 has 264 kB of SRAM: read the
+    # whole file once at startup so playback never touches the SD card.
+    path = "/sd/" + filename
+    buf = bytearray(uos.stat(path)[6] - 44)
+    with open(path, "rb") as f:
+        f.seek(44)  # canonical 44-byte header
+        f.readinto(buf)
+    return memoryview(buf)
+
+
+def play_ram(i2s, sample, loop=False):
+    # Queue BUFFER_SIZE-sized slices straight out of the preloaded
+    # sample - no copy, no SD traffic, no second buffer to fill. The
+    # wait on each slice still polls the bus.
+    global _tx_done
+    n = len(sample)
+    i = 0
+    while True:
+        end = i + BUFFER_SIZE
+        if end > n:
+            end = n
+        _tx_done = False
+        i2s.write(sample[i:end])
+        while not _tx_done:
+            poll_isa()  # bus monitoring keeps running during playback
+        i = end
+        if i >= n:
+            if loop:
+                i = 0
+            else:
+                return
+
+
+def poll_isa():
+    # Drain any matched addresses the PIO filters let through; safe to
+    # call from anywhere, including the playback wait loop. The viper
+    # drain empties a full 8-deep FIFO in a few microseconds, so no
+    # per-call cap is needed any more.
+    global hit_pending, last_event
+    n = _drain_fifo(_ior_rxf, _ior_flevel, _ior_shift)
+    n += _drain_fifo(_iow_rxf, _iow_flevel, _iow_shift)
+    if n:
+        hit_pending = True
+        last_event = time.ticks_ms()
+
+
+init_sd()
+idle_sample = preload(IDLE_WAV)
+access_sample = preload(ACCESS_WAV)
+i2s = init_i2s()
+
+print("HDD Synth mk5 running")
+hdd_active = False
+hit_pending = False
+last_event = time.ticks_ms()
+while True:
+    poll_isa()
+    if hit_pending:
+        hit_pending = False
+        if not hdd_active:
+            hdd_active = True
+            play_ram(i2s, access_sample)
+    elif hdd_active and time.ticks_diff(time.ticks_ms(),
+                                        last_event) > ACCESS_HOLDOFF_MS:
+        hdd_active = False
+        play_ram(i2s, idle_sample)
+    time.sleep_ms(1)
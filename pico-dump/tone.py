@@ -0,0 +1,45 @@
+# tone.py - I2S sanity check: loops one cycle-accurate sine table out of
+# the DAC so amp wiring and sample-rate setup can be verified without the
+# SD card in the loop.
+
+import array
+import math
+from machine import Pin, I2S
+
+I2S_ID = 0
+I2S_SCK_PIN = 16
+I2S_WS_PIN = 17
+I2S_SD_PIN = 18
+SAMPLE_RATE = 16000
+TONE_FREQUENCY = 440
+BUFFER_LENGTH = 1000
+AMPLITUDE = 12000
+
+
+def make_sine_table():
+    # Two-term Chebyshev recurrence: s[n+1] = 2*cos(w)*s[n] - s[n-1].
+    # One multiply and one subtract per sample instead of a math.sin call,
+    # so the table can be rebuilt cheaply for frequency sweeps.
+    samples = array.array("h", [0] * BUFFER_LENGTH)
+    w = 2 * math.pi * TONE_FREQUENCY / SAMPLE_RATE
+    k = 2 * math.cos(w)
+    s0 = 0.0
+    s1 = math.sin(w)
+    for i in range(BUFFER_LENGTH):
+        samples[i] = int(AMPLITUDE * s0)
+        s0, s1 = s1, k * s1 - s0
+    return samples
+
+
+audio_out = I2S(I2S_ID, sck=Pin(I2S_SCK_PIN), ws=Pin(I2S_WS_PIN),
+                sd=Pin(I2S_SD_PIN), mode=I2S.TX, bits=16,
+                format=I2S.MONO, rate=SAMPLE_RATE, ibuf=4000)
+
+samples = make_sine_table()
+print("Playing", TONE_FREQUENCY, "Hz test tone")
+try:
+    while True:
+        audio_out.write(samples)
+except KeyboardInterrupt:
+    audio_out.deinit()
+    print("Done")
@@ -0,0 +1,56 @@
+# wav_test.py - plays one WAV off the SD card, configuring I2S from the
+# file's own header. A mono file runs the interface in MONO: half the
+# DMA bandwidth of blindly forcing STEREO, and no pitch/speed surprises
+# when a sample was exported at a different rate.
+
+import uos
+import sdcard
+from machine import Pin, SPI, I2S
+
+SD_SPI_ID = 1
+SD_SCK_PIN = 14
+SD_MOSI_PIN = 15
+SD_MISO_PIN = 12
+SD_CS_PIN = 13
+
+I2S_ID = 0
+I2S_SCK_PIN = 16
+I2S_WS_PIN = 17
+I2S_SD_PIN = 18
+BUFFER_SIZE = 4096
+
+WAV_FILE = "nec_spinup_16hz_16bit.wav"
+
+
+def read_wav_header(f):
+    # Canonical 44-byte header: channels at offset 22, sample rate at
+    # 24, bits per sample at 34
+    header = f.read(44)
+    channels = int.from_bytes(header[22:24], "little")
+    rate = int.from_bytes(header[24:28], "little")
+    bits = int.from_bytes(header[34:36], "little")
+    return channels, rate, bits
+
+
+spi = SPI(SD_SPI_ID, sck=Pin(SD_SCK_PIN), mosi=Pin(SD_MOSI_PIN),
+          miso=Pin(SD_MISO_PIN))
+sd = sdcard.SDCard(spi, Pin(SD_CS_PIN), baudrate=25_000_000)
+uos.mount(sd, "/sd")
+
+with open("/sd/" + WAV_FILE, "rb") as f:
+    channels, rate, bits = read_wav_header(f)
+    print(WAV_FILE + ":", channels, "ch,", rate, "Hz,", bits, "bit")
+    audio_out = I2S(I2S_ID, sck=Pin(I2S_SCK_PIN), ws=Pin(I2S_WS_PIN),
+                    sd=Pin(I2S_SD_PIN), mode=I2S.TX, bits=bits,
+                    format=I2S.MONO if channels == 1 else I2S.STEREO,
+                    rate=rate, ibuf=2 * BUFFER_SIZE)
+    buf = bytearray(BUFFER_SIZE)
+    mv = memoryview(buf)
+    n = f.readinto(buf)
+    while n:
+        audio_out.write(mv[:n])
+        n = f.readinto(buf)
+    audio_out.deinit()
+
+uos.umount("/sd")
+print("Done")
@@ -0,0 +1,84 @@
+# audio_mixer.py - tiny software mixer prototype. Voices are signed
+# 16-bit sample buffers - the same format the WAVs store and the I2S DAC
+# consumes - mixed block-at-a-time with a viper accumulate-and-clip loop.
+
+import array
+import micropython
+
+
+def load_wav(path):
+    # Prototype-grade loader: assumes a canonical 44-byte header and
+    # signed 16-bit mono samples
+    with open(path, "rb") as f:
+        f.seek(44)
+        data = array.array("h")
+        data.frombytes(f.read())
+    return data
+
+
+@micropython.viper
+def _mix_add(dst: ptr16, src: ptr16, n: int):
+    # Saturating add of one voice block into the output block. ptr16
+    # loads are unsigned, so sign-extend both sides before summing.
+    for i in range(n):
+        a = int(dst[i])
+        if a >= 0x8000:
+            a -= 0x10000
+        b = int(src[i])
+        if b >= 0x8000:
+            b -= 0x10000
+        acc = a + b
+        if acc > 32767:
+            acc = 32767
+        elif acc < -32768:
+            acc = -32768
+        dst[i] = acc
+
+
+class Sound:
+    def __init__(self, data, loop=False):
+        self.data = data
+        self.mv = memoryview(data)
+        self.pos = 0
+        self.loop = loop
+        self.playing = True
+
+
+class Mixer:
+    def __init__(self, block):
+        self.block = block
+        self.sounds = []
+        # Output block and silence template owned by the mixer so the
+        # steady state never allocates
+        self.out = array.array("h", [0] * block)
+        self._out_mv = memoryview(self.out)
+        self._silence = array.array("h", [0] * block)
+
+    def add(self, sound):
+        self.sounds.append(sound)
+
+    def mix_into(self):
+        # Fill self.out with one mixed block. Each voice is added with
+        # one native loop per contiguous run; a voice wrapping or ending
+        # mid-block just splits into two runs.
+        n = self.block
+        self.out[:] = self._silence
+        for snd in self.sounds:
+            if not snd.playing:
+                continue
+            filled = 0
+            while filled < n and snd.playing:
+                avail = len(snd.data) - snd.pos
+                take = n - filled
+                if take > avail:
+                    take = avail
+                _mix_add(self._out_mv[filled:filled + take],
+                         snd.mv[snd.pos:snd.pos + take], take)
+                snd.pos += take
+                filled += take
+                if snd.pos >= len(snd.data):
+                    if snd.loop:
+                        snd.pos = 0
+                    else:
+                        snd.playing = False
+        return self.out
@@ -0,0 +1,27 @@
+# main.py - audio mixer prototype bench. Mixes a looped idle voice with
+# one-shot access bursts in software and streams the result over I2S.
+
+from machine import Pin, I2S
+from audio_mixer import Mixer, Sound, load_wav
+
+I2S_ID = 0
+I2S_SCK_PIN = 16
+I2S_WS_PIN = 17
+I2S_SD_PIN = 18
+SAMPLE_RATE = 16000
+BLOCK = 128
+
+IDLE_WAV = "/sd/idle.wav"
+ACCESS_WAV = "/sd/access.wav"
+
+audio_out = I2S(I2S_ID, sck=Pin(I2S_SCK_PIN), ws=Pin(I2S_WS_PIN),
+                sd=Pin(I2S_SD_PIN), mode=I2S.TX, bits=16,
+                format=I2S.MONO, rate=SAMPLE_RATE, ibuf=8 * BLOCK)
+
+mixer = Mixer(BLOCK)
+mixer.add(Sound(load_wav(IDLE_WAV), loop=True))
+mixer.add(Sound(load_wav(ACCESS_WAV)))
+
+print("Mixer prototype running")
+while True:
+    audio_out.write(mixer.mix_into())
@@ -0,0 +1,203 @@
+# handler.py - sandbox experiment: classify ISA I/O cycles by device
+# (HDD / FDD / keyboard) and log them over the console. Used to work out
+# which ports the real firmware should key off.
+
+import array
+import sys
+import time
+import machine
+import rp2
+import _thread
+from machine import Pin
+
+ADDR_PIN_BASE = 0   # GP0..GP9 = ISA SA0..SA9
+IOR_PIN = 10        # ISA /IOR
+IOW_PIN = 11        # ISA /IOW
+
+REPORT_THRESHOLD = 10   # classified events per burst report
+
+
+# Prefilter in the state machine: the captured address is shifted right
+# five bits through the OSR and compared against the three 32-port
+# blocks the classifier cares about (IDE at 0x1E0, floppy/COM at 0x3E0,
+# keyboard controller at 0x60) using set's 5-bit immediates. Only block
+# hits are pushed, with the full address so detect_device still makes
+# the exact call; the rest of the bus never reaches the FIFO. The
+# strobe comes from each instance's jmp_pin, so one program serves both
+# state machines.
+#
+# JOIN_RX folds the unused TX FIFO into RX for an 8-deep capture buffer,
+# matching the other monitors: at 4 words a single slow consumer pass
+# could overflow during a burst, and this program never transmits.
+@rp2.asm_pio(in_shiftdir=rp2.PIO.SHIFT_LEFT,
+             out_shiftdir=rp2.PIO.SHIFT_RIGHT,
+             fifo_join=rp2.PIO.JOIN_RX)
+def isa_monitor():
+    wrap_target()
+    label("released")
+    jmp(pin, "armed")    # strobe released (high): arm the edge detect
+    jmp("released")
+    label("armed")
+    jmp(pin, "armed")    # falls through on the falling edge
+    in_(pins, 10)
+    mov(osr, isr)
+    out(null, 5)         # OSR = addr >> 5
+    mov(x, osr)
+    set(y, 0x0F)         # 0x1E0-0x1FF: IDE block
+    jmp(x_not_y, "not_hdd")
+    jmp("emit")
+    label("not_hdd")
+    set(y, 0x1F)         # 0x3E0-0x3FF: floppy block (and COM1)
+    jmp(x_not_y, "not_fdd")
+    jmp("emit")
+    label("not_fdd")
+    set(y, 0x03)         # 0x60-0x7F: keyboard controller block
+    jmp(x_not_y, "reject")
+    label("emit")
+    push(noblock)        # full address; push also clears the ISR
+    irq(rel(0))          # wake the CPU out of WFI
+    label("reject")
+    mov(isr, null)
+    wrap()
+
+
+sm_ior = rp2.StateMachine(0, isa_monitor, freq=4_000_000,
+                          in_base=Pin(ADDR_PIN_BASE), jmp_pin=Pin(IOR_PIN))
+sm_iow = rp2.StateMachine(1, isa_monitor, freq=4_000_000,
+                          in_base=Pin(ADDR_PIN_BASE), jmp_pin=Pin(IOW_PIN))
+_pio_event = False
+
+
+def _on_pio_event(sm):
+    # Hard handler: no scheduling delay, no allocation - just the flag
+    global _pio_event
+    _pio_event = True
+
+
+sm_ior.irq(_on_pio_event, hard=True)
+sm_iow.irq(_on_pio_event, hard=True)
+sm_ior.active(1)
+sm_iow.active(1)
+
+
+# One byte per I/O address: 1 = HDD, 2 = FDD, 3 = KBD, 0 = ignore.
+# A single indexed load replaces up to six range compares per event.
+# Build order matters: the floppy block goes in first so the IDE
+# alternate-status port at 0x3F6 can override it.
+_HDD = 1
+_FDD = 2
+_KBD = 3
+_DEVICE_LUT = bytearray(1024)
+for _a in range(0x3F0, 0x3F8):
+    _DEVICE_LUT[_a] = _FDD
+for _a in range(0x1F0, 0x1F8):
+    _DEVICE_LUT[_a] = _HDD
+_DEVICE_LUT[0x3F6] = _HDD
+_DEVICE_LUT[0x60] = _KBD
+_DEVICE_LUT[0x64] = _KBD
+_DEV_NAMES = (None, "hdd", "fdd", "kbd")
+
+# Pre-encoded address text for every port the LUT classifies: the emit
+# path was calling hex().encode() per event, two fresh objects per bus
+# cycle during a sector transfer. Only classified addresses can reach
+# the log, so the map stays small.
+_ADDR_STR = {_a: (hex(_a) + "\n").encode()
+             for _a in range(1024) if _DEVICE_LUT[_a]}
+
+
+counters = {"hdd": 0, "fdd": 0, "kbd": 0}
+
+# Core 1 drains both RX FIFOs into this shared ring so a blocking
+# console write on core 0 (USB CDC can stall for milliseconds) never
+# backs up into the capture path. Single producer, single consumer:
+# core 1 only writes _ev_head, core 0 only writes _ev_tail, and both
+# indices run free with the mask applied on access.
+_EV_RING = 4096
+_ev_buf = array.array("H", [0] * _EV_RING)
+_ev_head = 0
+_ev_tail = 0
+
+
+def _capture():
+    global _ev_head
+    buf = _ev_buf
+    rx_ior = sm_ior.rx_fifo
+    get_ior = sm_ior.get
+    rx_iow = sm_iow.rx_fifo
+    get_iow = sm_iow.get
+    head = 0
+    while True:
+        n = rx_ior()
+        for _ in range(n):
+            buf[head & (_EV_RING - 1)] = get_ior() & 0x3FF
+            head += 1
+        n = rx_iow()
+        for _ in range(n):
+            buf[head & (_EV_RING - 1)] = get_iow() & 0x3FF
+            head += 1
+        _ev_head = head
+
+
+_thread.start_new_thread(_capture, ())
+
+# Log lines accumulate here and go out in one stdout write when the
+# buffer passes 400 bytes or 20 ms have gone by - each print() was its
+# own USB CDC transaction, which back-pressured the drain loop long
+# before the Python overhead did. The per-line constants are
+# precomposed bytes so the hot path does no string formatting beyond
+# the address itself.
+_out = bytearray(512)
+_out_mv = memoryview(_out)
+_out_pos = 0
+_last_flush = time.ticks_ms()
+_TAGS = {"hdd": b"hdd ", "fdd": b"fdd ", "kbd": b"kbd "}
+_BURSTS = {"hdd": b"hdd burst\n", "fdd": b"fdd burst\n",
+           "kbd": b"kbd burst\n"}
+
+
+def emit(data):
+    global _out_pos
+    n = len(data)
+    if _out_pos + n > len(_out):
+        flush()
+    _out[_out_pos:_out_pos + n] = data
+    _out_pos += n
+
+
+def flush():
+    global _out_pos, _last_flush
+    if _out_pos:
+        sys.stdout.buffer.write(_out_mv[:_out_pos])
+        _out_pos = 0
+    _last_flush = time.ticks_ms()
+
+
+print("ISA device classifier running")
+while True:
+    # Consume everything core 1 ringed up since the last wake, then run
+    # the report pass once on the batch - a sector transfer is dozens of
+    # back-to-back cycles and per-event threshold checks were pure
+    # overhead.
+    head = _ev_head
+    while _ev_tail != head:
+        addr = _ev_buf[_ev_tail & (_EV_RING - 1)]
+        _ev_tail += 1
+        dev = _DEVICE_LUT[addr]
+        if dev:
+            device = _DEV_NAMES[dev]
+            counters[device] += 1
+            emit(_TAGS[device])
+            emit(_ADDR_STR[addr])
+    for device in ("hdd", "fdd", "kbd"):
+        if counters[device] > REPORT_THRESHOLD:
+            counters[device] = 0
+            emit(_BURSTS[device])
+    if (_out_pos > 400
+            or (_out_pos
+                and time.ticks_diff(time.ticks_ms(), _last_flush) > 20)):
+        flush()
+    # WFI instead of a blind 1 ms sleep: a classified event wakes the
+    # loop within microseconds instead of up to a millisecond later.
+    if not _pio_event:
+        machine.idle()
+    _pio_event = False
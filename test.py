@@ -0,0 +1,80 @@
+# test.py - on-device smoke test for the HDD Synth audio path. Runs with
+# no ISA bus attached: plays the idle loop for a few seconds, then forces
+# a run of access/idle transitions to shake out SD and I2S problems.
+
+import time
+from config import IDLE_WAV, ACCESS_WAV
+from main import HDDSynth
+
+TEST_IDLE_DURATION = 5    # seconds
+TEST_TRANSITIONS = 10
+TRANSITION_HOLD_MS = 500
+
+
+class _StatePool:
+    # Fixed pool of transition records, allocated up front. The test
+    # loop churned through a fresh dict per transition, which is exactly
+    # the steady allocation that triggers GC pauses mid-playback - the
+    # thing the transition test is there to catch.
+    def __init__(self, size):
+        self._free = [{"active": False, "ts": 0} for _ in range(size)]
+
+    def get(self, active, ts):
+        record = self._free.pop()
+        record["active"] = active
+        record["ts"] = ts
+        return record
+
+    def release(self, record):
+        self._free.append(record)
+
+
+class HDDSynthTest:
+    # __slots__ drops the per-instance dict, and the synth itself is
+    # built lazily: constructing HDDSynth brings up SD and I2S, which
+    # is wasted import-time work (and a couple hundred bytes of log
+    # strings) when only one test gets run.
+    __slots__ = ('hdd_synth', 'test_mode')
+
+    def __init__(self):
+        self.hdd_synth = None
+        self.test_mode = True
+
+    def _ensure(self):
+        if self.hdd_synth is None:
+            self.hdd_synth = HDDSynth()
+        return self.hdd_synth
+
+    def test_idle_loop(self):
+        print("Idle loop for", TEST_IDLE_DURATION, "seconds")
+        synth = self._ensure()
+        synth._play_audio_file(IDLE_WAV, loop=True)
+        # Integer millisecond deadline: time.time() only ticks once a
+        # second and allocates, which is enough GC noise to mask real
+        # stutter in the playback pump
+        deadline = time.ticks_add(time.ticks_ms(),
+                                  TEST_IDLE_DURATION * 1000)
+        while time.ticks_diff(deadline, time.ticks_ms()) > 0:
+            synth._update_audio_playback()
+        print("Idle loop OK")
+
+    def test_audio_transitions(self):
+        print("Running", TEST_TRANSITIONS, "audio transitions")
+        synth = self._ensure()
+        pool = _StatePool(2)
+        for i in range(TEST_TRANSITIONS):
+            active = (i & 1) == 0
+            record = pool.get(active, time.ticks_ms())
+            synth._play_audio_file(ACCESS_WAV if active else IDLE_WAV,
+                                   loop=True)
+            deadline = time.ticks_add(time.ticks_ms(), TRANSITION_HOLD_MS)
+            while time.ticks_diff(deadline, time.ticks_ms()) > 0:
+                synth._update_audio_playback()
+            print("Transition", record)
+            pool.release(record)
+        print("Transitions OK")
+
+
+test = HDDSynthTest()
+test.test_idle_loop()
+test.test_audio_transitions()